@@ -0,0 +1,435 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from script import (
+    ADDRESS_EXTRACT,
+    GET_DIRECTIONS_ANYWHERE,
+    HttpPool,
+    MILES_ANYWHERE,
+    PHONE_ANYWHERE,
+    SidebarDiff,
+    ZIP_ANCHOR,
+    clear_parse_cache,
+    extract_address_only,
+    extract_unique_addresses,
+    fetch_seed_http,
+    match_address,
+    norm,
+    parse_cache_stats,
+)
+
+
+BENCH_DIR = Path(__file__).resolve().parent / "bench"
+SYNTHETIC_GOLDEN = BENCH_DIR / "synthetic_golden.json"
+CORPUS_DIR = BENCH_DIR / "corpus"
+SYNTHETIC_SIZES = (10, 100, 1000, 5000)
+
+STRESS_SIZES = (4000, 16000, 64000, 256000)
+STRESS_LEGACY_MAX = 16000
+STRESS_REPEAT = 3
+STRESS_MAX_GROWTH = 2.0
+STRESS_SHAPES: Dict[str, Callable[[int], str]] = {
+    "number_comma_runs": lambda n: ("1 a, " * n)[:n],
+    "bare_numbers": lambda n: ("1 " * n)[:n],
+    "tails_no_commas": lambda n: ("1 x CA 90001 " * n)[:n],
+    "comma_pairs_no_tail": lambda n: ("1 a, b, " * n)[:n],
+    "address_after_junk": lambda n: ("1 a, b, " * n)[:n] + " 100 Main St, Fresno, CA 93721",
+    "tails_after_commas": lambda n: ("1 a, b, " + "x CA 90001 " * n)[:n],
+}
+
+STREETS = ("Main St", "Oak Ave", "El Camino Real", "Mission Blvd", "Broadway", "Wilshire Blvd Ste 200")
+CITIES = ("Sacramento", "Los Angeles", "San Diego", "Fresno", "Oakland", "San Luis Obispo")
+
+
+def norm_legacy(s: str) -> str:
+    s = re.sub(r"\s+", " ", s).strip()
+    s = re.sub(r"\s+,", ",", s)
+    s = re.sub(r",\s+", ", ", s)
+    return s
+
+
+def extract_address_only_legacy(line_or_block: str) -> Optional[str]:
+    s = norm_legacy(line_or_block)
+    s = GET_DIRECTIONS_ANYWHERE.sub("", s)
+    s = MILES_ANYWHERE.sub("", s)
+    s = PHONE_ANYWHERE.sub("", s)
+    s = norm_legacy(s)
+
+    m = ADDRESS_EXTRACT.search(s)
+    if m:
+        return norm_legacy(m.group(1))
+
+    if ZIP_ANCHOR.search(s) and re.search(r"\d", s):
+        idx = s.lower().rfind(", ca ")
+        if idx != -1:
+            return norm_legacy(s[:].strip())
+
+    return None
+
+
+def extract_unique_addresses_legacy(sidebar_text: str) -> List[str]:
+    raw_lines = [ln.strip() for ln in sidebar_text.splitlines() if ln.strip()]
+    cleaned_lines = [norm_legacy(ln) for ln in raw_lines]
+
+    out: List[str] = []
+
+    for ln in cleaned_lines:
+        if ZIP_ANCHOR.search(ln):
+            a = extract_address_only_legacy(ln)
+            if a:
+                out.append(a)
+
+    block: List[str] = []
+    for ln in cleaned_lines:
+        block.append(ln)
+        if len(block) > 5:
+            block = block[-5:]
+        if ZIP_ANCHOR.search(ln):
+            for k in (2, 3, 4, 5):
+                if len(block) >= k:
+                    cand = " ".join(block[-k:])
+                    a = extract_address_only_legacy(cand)
+                    if a:
+                        out.append(a)
+                        break
+
+    seen = set()
+    uniq = []
+    for a in out:
+        a2 = norm_legacy(a)
+        if a2 and a2 not in seen:
+            seen.add(a2)
+            uniq.append(a2)
+    return uniq
+
+
+def synthetic_sidebar(entries: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    lines: List[str] = []
+    for k in range(entries):
+        street = f"{rnd.randint(1, 99999)} {rnd.choice(STREETS)}"
+        city = rnd.choice(CITIES)
+        zip5 = f"9{rnd.randint(0, 6199):04d}"
+        lines.append(f"  Community Clinic {k}   ({rnd.uniform(0, 50):.1f})  miles")
+        if rnd.random() < 0.3:
+            lines.append(f"{street} ,  {city},   CA {zip5}")
+        else:
+            lines.append(street)
+            lines.append(f"{city} , CA  {zip5}")
+        lines.append(f"Phone:  ({rnd.randint(200, 999)}) {rnd.randint(200, 999)}-{rnd.randint(0, 9999):04d}")
+        lines.append("Get Directions")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def overlapping_sidebars(pool: int, window: int, step: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    entries = synthetic_sidebar(pool, seed).split("\n\n")
+    sidebars = []
+    for start in range(0, max(pool - window, 0) + 1, step):
+        blocks = [
+            re.sub(r"\(\d+\.\d\)", f"({rnd.uniform(0, 50):.1f})", block, count=1)
+            for block in entries[start:start + window]
+        ]
+        sidebars.append("\n\n".join(blocks))
+    return sidebars
+
+
+def time_per_call(fn: Callable[[str], object], samples: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        clear_parse_cache()
+        t0 = time.perf_counter()
+        for s in samples:
+            fn(s)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(samples) * 1e9
+
+
+def digest(addrs: List[str]) -> str:
+    return hashlib.sha256("\n".join(addrs).encode("utf-8")).hexdigest()
+
+
+def synthetic_cases(sizes: List[int]) -> Dict[str, str]:
+    return {f"synthetic_{n}": synthetic_sidebar(n, seed=n) for n in sizes}
+
+
+def load_corpus(corpus_dir: Path) -> Dict[str, str]:
+    if not corpus_dir.is_dir():
+        return {}
+    return {f"recorded_{p.stem}": p.read_text(encoding="utf-8") for p in sorted(corpus_dir.glob("*.txt"))}
+
+
+def check_golden(cases: Dict[str, str], corpus_dir: Path, update: bool) -> List[str]:
+    golden = json.loads(SYNTHETIC_GOLDEN.read_text(encoding="utf-8")) if SYNTHETIC_GOLDEN.exists() else {}
+    failures: List[str] = []
+
+    for name, text in cases.items():
+        addrs = extract_unique_addresses(text)
+        if name.startswith("recorded_"):
+            path = corpus_dir / f"{name[len('recorded_'):]}.golden"
+            if update:
+                path.write_text("".join(a + "\n" for a in addrs), encoding="utf-8")
+            elif not path.exists() or path.read_text(encoding="utf-8").splitlines() != addrs:
+                failures.append(name)
+        else:
+            expected = {"addresses": len(addrs), "sha256": digest(addrs)}
+            if update:
+                golden[name] = expected
+            elif golden.get(name) != expected:
+                failures.append(name)
+
+    if update:
+        BENCH_DIR.mkdir(parents=True, exist_ok=True)
+        SYNTHETIC_GOLDEN.write_text(json.dumps(golden, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    return failures
+
+
+def bench_norm(lines: List[str], repeat: int) -> None:
+    samples = lines + [" ".join(lines[i:i + 3]) for i in range(len(lines))]
+
+    mismatches = [s for s in samples if norm(s) != norm_legacy(s)]
+    if mismatches:
+        raise SystemExit(f"norm differs from legacy on {len(mismatches)} inputs, e.g. {mismatches[0]!r}")
+
+    legacy_ns = time_per_call(norm_legacy, samples, repeat)
+    new_ns = time_per_call(norm, samples, repeat)
+    print(f"norm                      {len(samples):>8} inputs  legacy {legacy_ns:>7.0f} ns/call  "
+          f"current {new_ns:>7.0f} ns/call  x{legacy_ns / new_ns:.1f}")
+
+
+def bench_extract_address_only(lines: List[str], repeat: int) -> None:
+    samples = [ln for ln in lines if ln.strip()]
+    legacy_ns = time_per_call(extract_address_only_legacy, samples, repeat)
+    new_ns = time_per_call(extract_address_only, samples, repeat)
+    print(f"extract_address_only      {len(samples):>8} inputs  legacy {legacy_ns:>7.0f} ns/call  "
+          f"current {new_ns:>7.0f} ns/call  x{legacy_ns / new_ns:.1f}")
+
+
+def bench_extract(cases: Dict[str, str], repeat: int) -> List[str]:
+    diverged: List[str] = []
+    print(f"{'case':<22} {'lines':>7} {'addrs':>6} {'ns/line':>9} {'addrs/s':>11} {'legacy ns/line':>15} {'legacy':>7}")
+    for name, text in cases.items():
+        lines = max(len(text.splitlines()), 1)
+        addrs = extract_unique_addresses(text)
+        same = addrs == extract_unique_addresses_legacy(text)
+        if not same:
+            diverged.append(name)
+
+        new_s = time_per_call(extract_unique_addresses, [text], repeat) / 1e9
+        legacy_s = time_per_call(extract_unique_addresses_legacy, [text], repeat) / 1e9
+        print(f"{name:<22} {lines:>7} {len(addrs):>6} {new_s / lines * 1e9:>9.0f} "
+              f"{len(addrs) / new_s if new_s else 0:>11.0f} {legacy_s / lines * 1e9:>15.0f} "
+              f"{'same' if same else 'DIFF':>7}")
+    return diverged
+
+
+def bench_cache(repeat: int) -> None:
+    sidebars = overlapping_sidebars(pool=2000, window=200, step=20)
+    lines = sum(len(text.splitlines()) for text in sidebars)
+
+    def crawl(cached: bool) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            clear_parse_cache()
+            t0 = time.perf_counter()
+            for text in sidebars:
+                if not cached:
+                    clear_parse_cache()
+                extract_unique_addresses(text)
+            best = min(best, time.perf_counter() - t0)
+        return best
+
+    cold_s = crawl(cached=False)
+    warm_s = crawl(cached=True)
+    stats = parse_cache_stats()
+    print(f"overlapping crawl         {len(sidebars):>8} sidebars  uncached {cold_s / lines * 1e9:>6.0f} ns/line  "
+          f"cached {warm_s / lines * 1e9:>6.0f} ns/line  x{cold_s / warm_s:.1f}  hit rate {stats['hit_rate']:.1%}")
+
+    best = float("inf")
+    for _ in range(repeat):
+        clear_parse_cache()
+        diff = SidebarDiff()
+        t0 = time.perf_counter()
+        for text in sidebars:
+            diff.extract(text)
+        best = min(best, time.perf_counter() - t0)
+    print(f"entry-block diff          {len(sidebars):>8} sidebars  {best / lines * 1e9:>6.0f} ns/line  "
+          f"x{cold_s / best:.1f}  parsed {diff.parsed} reused {diff.reused}")
+
+
+def bench_stress(sizes: List[int]) -> List[str]:
+    """Time match_address on pathological lines; return shapes whose ns/char grows with size."""
+    superlinear: List[str] = []
+    for shape, make in STRESS_SHAPES.items():
+        per_char: List[float] = []
+        for n in sizes:
+            line = make(n)
+            new_s = float("inf")
+            for _ in range(STRESS_REPEAT):
+                clear_parse_cache()
+                t0 = time.perf_counter()
+                got = match_address(line)
+                new_s = min(new_s, time.perf_counter() - t0)
+            per_char.append(new_s / len(line))
+            legacy = "skipped"
+            if n <= STRESS_LEGACY_MAX:
+                t0 = time.perf_counter()
+                ADDRESS_EXTRACT.search(line)
+                legacy = f"{(time.perf_counter() - t0) * 1e3:>8.1f} ms"
+            print(f"stress {shape:<20} {len(line):>7} chars  bounded {new_s * 1e3:>7.2f} ms "
+                  f"({new_s / len(line) * 1e9:>5.0f} ns/char)  legacy {legacy}  match={'yes' if got else 'no'}")
+        if per_char and per_char[-1] > STRESS_MAX_GROWTH * min(per_char):
+            superlinear.append(shape)
+    return superlinear
+
+
+def stand_in_payload(query: str) -> Tuple[int, str, str]:
+    """Fake locator backend: (status, content type, body) for one query."""
+    z, _, suffix = query.partition(",")
+    rnd = random.Random(z)
+    addrs = [f"{rnd.randint(1, 9999)} {rnd.choice(STREETS)}, {rnd.choice(CITIES)}, CA {z}" for _ in range(3)]
+    kind = int(z) % 5
+    if kind == 1:
+        return 200, "application/json", "null"
+    if kind == 2 and not suffix:
+        return 500, "text/plain", "try again"
+    if kind == 3:
+        markers = "".join(f'<marker name="Clinic" address="{a}"/>' for a in addrs)
+        return 200, "text/xml", f"<markers>{markers}</markers>"
+    return 200, "application/json", json.dumps({"results": [{"name": "Clinic", "address": a} for a in addrs]})
+
+
+def stand_in_expected(z: str) -> Tuple[str, List[str]]:
+    kind = int(z) % 5
+    if kind == 1:
+        return "zip", []
+    status, _, body = stand_in_payload(z if kind != 2 else f"{z}, CA")
+    addrs = re.findall(r'"address": "([^"]+)"', body) or re.findall(r'address="([^"]+)"', body)
+    return ("zip_ca" if kind == 2 else "zip"), addrs
+
+
+def http_selftest(seeds: int, connections: int) -> bool:
+    peers: Set[Tuple[str, int]] = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            peers.add(self.client_address)
+            query = parse_qs(urlsplit(self.path).query).get("q", [""])[0]
+            status, ctype, body = stand_in_payload(query)
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{ctype}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    template = f"http://127.0.0.1:{server.server_address[1]}/locations?q={{query}}&radius={{radius}}"
+    zips = [f"{90000 + k}" for k in range(seeds)]
+
+    async def crawl() -> List[Tuple[str, List[str]]]:
+        pool = HttpPool(template, size=connections)
+        try:
+            return await asyncio.gather(*(fetch_seed_http(pool, template, z, None) for z in zips))
+        finally:
+            pool.close()
+
+    try:
+        t0 = time.perf_counter()
+        got = asyncio.run(crawl())
+        elapsed = time.perf_counter() - t0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    wrong = [z for z, res in zip(zips, got) if tuple(res) != stand_in_expected(z)]
+    ok = not wrong and len(peers) <= connections
+    print(f"http selftest  {seeds} seeds over {len(peers)} connections (pool {connections})  "
+          f"{elapsed * 1e3:.0f} ms  {'ok' if ok else 'FAILED'}")
+    if wrong:
+        print(f"  unexpected results for: {', '.join(wrong[:10])}")
+    return ok
+
+
+async def record_corpus(zips: List[str], corpus_dir: Path, headless: bool) -> None:
+    from playwright.async_api import async_playwright
+
+    from script import open_locator, set_query_and_search_fast
+
+    corpus_dir.mkdir(parents=True, exist_ok=True)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)
+        page = await browser.new_page()
+        frame = await open_locator(page)
+        for z in zips:
+            status, text, _ = await set_query_and_search_fast(frame, z)
+            if status != "ok" or not text:
+                print(f"[record] zip={z} failed")
+                continue
+            (corpus_dir / f"{z}.txt").write_text(text + "\n", encoding="utf-8")
+            print(f"[record] zip={z} lines={len(text.splitlines())}")
+        await browser.close()
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default=",".join(str(n) for n in SYNTHETIC_SIZES))
+    ap.add_argument("--corpus", default=str(CORPUS_DIR))
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--update_golden", action="store_true")
+    ap.add_argument("--record", default="")
+    ap.add_argument("--headful", action="store_true")
+    ap.add_argument("--stress", action="store_true", help="time address extraction on pathological lines")
+    ap.add_argument("--http_selftest", action="store_true", help="run the HTTP engine against a local stand-in server")
+    ap.add_argument("--http_seeds", type=int, default=60)
+    ap.add_argument("--http_connections", type=int, default=4)
+    args = ap.parse_args()
+
+    if args.http_selftest and not http_selftest(args.http_seeds, args.http_connections):
+        raise SystemExit("HTTP selftest failed")
+
+    corpus_dir = Path(args.corpus)
+    if args.record:
+        asyncio.run(record_corpus([z.strip() for z in args.record.split(",") if z.strip()], corpus_dir, not args.headful))
+
+    sizes = [int(n) for n in args.sizes.split(",") if n.strip()]
+    cases = synthetic_cases(sizes)
+    cases.update(load_corpus(corpus_dir))
+    if not any(name.startswith("recorded_") for name in cases):
+        print(f"No recorded sidebars in {corpus_dir} (use --record ZIP,ZIP,... to capture some)")
+
+    failures = check_golden(cases, corpus_dir, args.update_golden)
+
+    largest = cases[f"synthetic_{max(sizes)}"].splitlines() if sizes else []
+    if largest:
+        bench_norm(largest, args.repeat)
+        bench_extract_address_only(largest, args.repeat)
+    diverged = bench_extract(cases, args.repeat)
+    bench_cache(args.repeat)
+    if args.stress:
+        superlinear = bench_stress(list(STRESS_SIZES))
+        if superlinear:
+            raise SystemExit(f"Extraction time per char grows with input size: {', '.join(superlinear)}")
+
+    if diverged:
+        print(f"Differs from legacy parser: {', '.join(diverged)}")
+    if failures:
+        raise SystemExit(f"Golden mismatch: {', '.join(failures)}")
+    print("Golden: updated" if args.update_golden else f"Golden: {len(cases)} cases ok")
@@ -1,9 +1,28 @@
 import asyncio
+import csv
+import gzip
+import hashlib
+import http.client
+import json
+import multiprocessing
 import re
+import sqlite3
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Set
+from statistics import median
+from typing import Awaitable, Deque, Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple, Union
+from urllib.parse import quote, urlsplit
 
-from playwright.async_api import async_playwright, Page, Frame
+from playwright.async_api import async_playwright, BrowserContext, CDPSession, Page, Frame, Route
 
 URL = "https://eziz.org/vfc/provider-locations/"
 IFRAME_SELECTOR = 'iframe[src*="vfc-provider-locations.html"]'
@@ -11,6 +30,45 @@ INPUT_SELECTOR = "#addressInput"
 RADIUS_SELECTOR = "#radiusSelect"
 BUTTON_SELECTOR = 'input[type="button"][value="Find Providers"]'
 SIDEBAR_SELECTOR = "#sidebar"
+RADIUS = "50"
+DATA_URL_PATTERN = r"^(?!https?://[^/]*(?:google|gstatic))[^#]*[?&](?:lat|lng|radius)="
+
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Accept": "application/json, text/xml, */*",
+    "Referer": URL,
+}
+
+BLOCK_RESOURCE_TYPES = ("image", "font", "media")
+BLOCK_HOSTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "facebook.com",
+    "hotjar.com",
+    "fonts.googleapis.com",
+    "fonts.gstatic.com",
+)
+
+PARSE_CACHE_SIZE = 65536
+BLOCK_CACHE_SIZE = 8192
+
+SINK_FLUSH_ROWS = 500
+SINK_FLUSH_SECONDS = 2.0
+STORE_BUSY_TIMEOUT_S = 30.0
+SNAPSHOT_TTL_S = 7 * 24 * 3600.0
+STORE_LOOKUP_CHUNK = 500
+EXPORT_ROW_GROUP = 100_000
+
+RECYCLE_CHECK_EVERY = 5
+RECYCLE_WINDOW = 5
+
+SeedResult = Tuple[int, str, str, List[str]]
+PendingResult = Tuple[int, str, str, Union[List[str], Awaitable[List[str]]]]
+EntryBlock = Tuple[Tuple[str, str, bool], ...]
+BlockResult = Tuple[Optional[str], Optional[str]]
 
 CA_ZIP_MIN = 90000
 CA_ZIP_MAX = 96199
@@ -19,11 +77,21 @@ ZIP_ANCHOR = re.compile(r"\bCA\s+9\d{4}(?:-\d{4})?\b", re.IGNORECASE)
 MILES_ANYWHERE = re.compile(r"\(\s*\d+(\.\d+)?\s*\)\s*miles?\.?", re.IGNORECASE)
 PHONE_ANYWHERE = re.compile(r"Phone:\s*\(\d{3}\)\s*\d{3}-\d{4}", re.IGNORECASE)
 GET_DIRECTIONS_ANYWHERE = re.compile(r"Get\s+Directions\s*", re.IGNORECASE)
+NOISE_TAIL = re.compile(r"(?:Get|Phone:(?:\s*\(\d{3}\))?|\((?:\s*\d+(?:\.\d+)?\s*\)?)?)$", re.IGNORECASE)
+DIRECTIONS_TAIL = re.compile(r"Get\s+Directions\s*$", re.IGNORECASE)
 
 ADDRESS_EXTRACT = re.compile(
     r"(\d{1,8}\s+.+?,\s*[^,]+?,\s*CA\s+9\d{4}(?:-\d{4})?)",
     re.IGNORECASE,
 )
+ZIP_TAIL = re.compile(r"CA\s+9\d{4}(?:-\d{4})?", re.IGNORECASE)
+NUMBER_RUN = re.compile(r"\d+(?=\s)")
+COMMA = re.compile(",")
+MAX_ADDRESS_CHARS = 256
+ADDRESS_SPLIT = re.compile(
+    r"^(?P<street>.+),\s*(?P<city>[^,]+?),\s*(?P<state>[A-Z]{2})\s+(?P<zip>\d{5}(?:-\d{4})?)$",
+    re.IGNORECASE,
+)
 
 
 def generate_ca_zip_seeds(step: int, jitter: bool) -> List[str]:
@@ -32,74 +100,427 @@ def generate_ca_zip_seeds(step: int, jitter: bool) -> List[str]:
 
 
 def norm(s: str) -> str:
-    s = re.sub(r"\s+", " ", s).strip()
-    s = re.sub(r"\s+,", ",", s)
-    s = re.sub(r",\s+", ", ", s)
-    return s
+    return " ".join(s.split()).replace(" ,", ",")
 
 
-def extract_address_only(line_or_block: str) -> Optional[str]:
-    s = norm(line_or_block)
+def clean_line(s: str) -> str:
     s = GET_DIRECTIONS_ANYWHERE.sub("", s)
     s = MILES_ANYWHERE.sub("", s)
     s = PHONE_ANYWHERE.sub("", s)
-    s = norm(s)
+    return norm(s)
 
-    m = ADDRESS_EXTRACT.search(s)
-    if m:
-        return norm(m.group(1))
+
+def find_address(s: str, max_chars: int = MAX_ADDRESS_CHARS) -> Optional[str]:
+    """Anchor-first equivalent of ``ADDRESS_EXTRACT.search`` on normalized text.
+
+    Each ``CA 9xxxx`` tail is resolved to the "street, city," comma pair in
+    front of it, then street numbers are paired with the first tail after them,
+    so the cost is linear in the input instead of the regex's backtracking over
+    every digit/comma combination. Candidates longer than ``max_chars`` are
+    rejected; below that bound the result is the same leftmost match.
+    """
+    commas = [m.start() for m in COMMA.finditer(s)]
+    if len(commas) < 2:
+        return None
+
+    tails: List[Tuple[int, int]] = []
+    for m in ZIP_TAIL.finditer(s):
+        k = bisect_left(commas, m.start())
+        if k < 2:
+            continue
+        city_end, street_end = commas[k - 1], commas[k - 2]
+        if m.start() - city_end - 1 > max_chars:
+            continue
+        gap = s[city_end + 1:m.start()]
+        if gap and not gap.isspace():
+            continue
+        if city_end - street_end < 2:
+            continue
+        tails.append((street_end, m.end()))
+    if not tails:
+        return None
+
+    j = 0
+    for run in NUMBER_RUN.finditer(s):
+        start, num_end = max(run.start(), run.end() - 8), run.end()
+        while j < len(tails) and tails[j][0] < num_end + 2:
+            j += 1
+        if j == len(tails):
+            return None
+        end = tails[j][1]
+        if end - start <= max_chars:
+            return s[start:end]
+    return None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def match_address(s: str) -> Optional[str]:
+    found = find_address(s)
+    if found:
+        return found
 
     if ZIP_ANCHOR.search(s) and re.search(r"\d", s):
         idx = s.lower().rfind(", ca ")
         if idx != -1:
-            return norm(s[:].strip())
+            return s
+
+    return None
 
+
+def extract_address_only(line_or_block: str) -> Optional[str]:
+    return match_address(clean_line(norm(line_or_block)))
+
+
+def noise_spans_break(line: str, cleaned: str) -> bool:
+    if NOISE_TAIL.search(line) or NOISE_TAIL.search(cleaned):
+        return True
+    if DIRECTIONS_TAIL.search(line):
+        rest = GET_DIRECTIONS_ANYWHERE.sub("", line)
+        return bool(rest) and not rest[-1].isspace()
+    return False
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def scan_line(raw: str) -> Tuple[str, str, bool, bool]:
+    line = norm(raw)
+    cleaned = clean_line(line)
+    return line, cleaned, noise_spans_break(line, cleaned), bool(ZIP_ANCHOR.search(line))
+
+
+def set_parse_cache_size(maxsize: int) -> None:
+    global scan_line, match_address
+    scan_line = lru_cache(maxsize=maxsize)(scan_line.__wrapped__)
+    match_address = lru_cache(maxsize=maxsize)(match_address.__wrapped__)
+
+
+def clear_parse_cache() -> None:
+    scan_line.cache_clear()
+    match_address.cache_clear()
+
+
+def parse_cache_stats() -> Dict[str, float]:
+    infos = (scan_line.cache_info(), match_address.cache_info())
+    hits = sum(info.hits for info in infos)
+    misses = sum(info.misses for info in infos)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "entries": sum(info.currsize for info in infos),
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+def extract_window_address(block: Sequence[Tuple[str, str, bool]]) -> Optional[str]:
+    lines = list(block)
+    for k in (2, 3, 4, 5):
+        if len(lines) < k:
+            break
+        window = lines[-k:]
+        if any(spans for _, _, spans in window[:-1]):
+            a = extract_address_only(" ".join(ln for ln, _, _ in window))
+        else:
+            a = match_address(norm(" ".join(cleaned for _, cleaned, _ in window)))
+        if a:
+            return a
     return None
 
 
 def extract_unique_addresses(sidebar_text: str) -> List[str]:
-    raw_lines = [ln.strip() for ln in sidebar_text.splitlines() if ln.strip()]
-    cleaned_lines = [norm(ln) for ln in raw_lines]
+    singles: List[str] = []
+    windows: List[str] = []
+    block: Deque[Tuple[str, str, bool]] = deque(maxlen=5)
 
-    out: List[str] = []
+    for raw in sidebar_text.splitlines():
+        ln, cleaned, spans, anchored = scan_line(raw)
+        if not ln:
+            continue
+        block.append((ln, cleaned, spans))
 
-    for ln in cleaned_lines:
-        if ZIP_ANCHOR.search(ln):
-            a = extract_address_only(ln)
+        if anchored:
+            a = match_address(cleaned)
+            if a:
+                singles.append(a)
+            a = extract_window_address(block)
             if a:
-                out.append(a)
-
-    block: List[str] = []
-    for ln in cleaned_lines:
-        block.append(ln)
-        if len(block) > 5:
-            block = block[-5:]
-        if ZIP_ANCHOR.search(ln):
-            for k in (2, 3, 4, 5):
-                if len(block) >= k:
-                    cand = " ".join(block[-k:])
-                    a = extract_address_only(cand)
-                    if a:
-                        out.append(a)
-                        break
+                windows.append(a)
+
+    return list(dict.fromkeys(singles + windows))
+
+
+def sidebar_blocks(sidebar_text: str) -> List[EntryBlock]:
+    """Split sidebar text into entry blocks: the last five lines up to each ZIP line.
+
+    A block holds everything extract_unique_addresses reads for that ZIP line,
+    so its result can be reused whenever the same block shows up again.
+    """
+    blocks: List[EntryBlock] = []
+    recent: Deque[Tuple[str, str, bool]] = deque(maxlen=5)
+    for raw in sidebar_text.splitlines():
+        ln, cleaned, spans, anchored = scan_line(raw)
+        if not ln:
+            continue
+        recent.append((ln, cleaned, spans))
+        if anchored:
+            blocks.append(tuple(recent))
+    return blocks
 
+
+def block_key(block: EntryBlock) -> bytes:
+    # Without noise spanning a line break only the cleaned lines are read, so
+    # distances and phone numbers that change between queries don't matter.
+    if any(spans for _, _, spans in block[:-1]):
+        text = "\x01" + "\x00".join(ln for ln, _, _ in block)
+    else:
+        text = "\x00".join(cleaned for _, cleaned, _ in block)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def parse_entry_block(block: EntryBlock) -> BlockResult:
+    return match_address(block[-1][1]), extract_window_address(block)
+
+
+def parse_entry_blocks(blocks: Sequence[EntryBlock]) -> List[BlockResult]:
+    return [parse_entry_block(block) for block in blocks]
+
+
+class SidebarDiff:
+    """Bounded memory of entry blocks parsed from recent sidebar snapshots.
+
+    ``split`` hashes the blocks of a new snapshot and separates the ones
+    already parsed from the fresh ones; ``commit`` stores the fresh results and
+    merges everything back into the address list extract_unique_addresses
+    would return. ``last_fresh == 0`` means the snapshot had nothing new.
+    """
+
+    def __init__(self, maxsize: int = BLOCK_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.blocks: "OrderedDict[bytes, BlockResult]" = OrderedDict()
+        self.parsed = 0
+        self.reused = 0
+        self.last_fresh = 0
+
+    def split(
+        self, sidebar_text: str
+    ) -> Tuple[List[bytes], Dict[bytes, BlockResult], Dict[bytes, EntryBlock]]:
+        keys: List[bytes] = []
+        known: Dict[bytes, BlockResult] = {}
+        fresh: Dict[bytes, EntryBlock] = {}
+        for block in sidebar_blocks(sidebar_text):
+            key = block_key(block)
+            keys.append(key)
+            if key in known or key in fresh:
+                continue
+            hit = self.blocks.get(key)
+            if hit is None:
+                fresh[key] = block
+            else:
+                self.blocks.move_to_end(key)
+                known[key] = hit
+        self.parsed += len(fresh)
+        self.reused += len(known)
+        self.last_fresh = len(fresh)
+        return keys, known, fresh
+
+    def commit(
+        self, keys: List[bytes], known: Dict[bytes, BlockResult], parsed: Dict[bytes, BlockResult]
+    ) -> List[str]:
+        for key, result in parsed.items():
+            self.blocks[key] = result
+            self.blocks.move_to_end(key)
+        while len(self.blocks) > self.maxsize:
+            self.blocks.popitem(last=False)
+
+        results = [known[key] if key in known else parsed[key] for key in keys]
+        singles = [single for single, _ in results if single]
+        windows = [window for _, window in results if window]
+        return list(dict.fromkeys(singles + windows))
+
+    def extract(self, sidebar_text: str) -> List[str]:
+        keys, known, fresh = self.split(sidebar_text)
+        return self.commit(keys, known, dict(zip(fresh, parse_entry_blocks(list(fresh.values())))))
+
+    async def commit_pending(
+        self,
+        keys: List[bytes],
+        known: Dict[bytes, BlockResult],
+        fresh: Dict[bytes, EntryBlock],
+        pending: Awaitable[List[BlockResult]],
+    ) -> List[str]:
+        return self.commit(keys, known, dict(zip(fresh, await pending)))
+
+
+def split_address(address: str) -> Optional[Dict[str, str]]:
+    m = ADDRESS_SPLIT.match(norm(address))
+    if not m:
+        return None
+    return {
+        "street": m.group("street"),
+        "city": m.group("city"),
+        "state": m.group("state").upper(),
+        "zip": m.group("zip"),
+    }
+
+
+def record_from_mapping(item: Dict[str, str]) -> Optional[Dict[str, str]]:
+    fields = {str(k).lower(): norm(str(v)) for k, v in item.items() if v is not None}
+    address = fields.get("address", "")
+    if fields.get("address2"):
+        address = f"{address}, {fields['address2']}"
+    zip_code = fields.get("zip") or fields.get("zipcode") or fields.get("zip_code") or fields.get("postal", "")
+    if not ZIP_ANCHOR.search(address) and fields.get("city") and zip_code:
+        address = f"{address}, {fields['city']}, {fields.get('state') or 'CA'} {zip_code}"
+    address = norm(address)
+    if not ZIP_ANCHOR.search(address):
+        return None
+
+    rec = {
+        "name": fields.get("name", ""),
+        "phone": fields.get("phone", ""),
+        "distance": fields.get("distance", ""),
+        "address": address,
+    }
+    rec.update(split_address(address) or {"street": "", "city": "", "state": "", "zip": ""})
+    return rec
+
+
+def parse_locations_payload(body: str) -> List[Dict[str, str]]:
+    body = body.strip()
+    if not body:
+        return []
+
+    items: List[Dict[str, str]] = []
+    if body.startswith("<"):
+        root = ET.fromstring(body)
+        for el in root.iter():
+            if el.attrib:
+                items.append(dict(el.attrib))
+            elif len(el) and all(len(child) == 0 for child in el):
+                items.append({child.tag: (child.text or "") for child in el})
+    else:
+        data = json.loads(body)
+        if isinstance(data, dict):
+            data = next((v for v in data.values() if isinstance(v, list)), [])
+        if not isinstance(data, list):
+            data = []
+        items = [d for d in data if isinstance(d, dict)]
+
+    return [rec for rec in (record_from_mapping(d) for d in items) if rec]
+
+
+def records_from_entries(entries: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    records: List[Dict[str, str]] = []
+    for entry in entries:
+        a = extract_address_only(entry["address"]) if entry.get("address") else None
+        rec = record_from_mapping(dict(entry, address=a)) if a else None
+        if rec is not None:
+            records.append(rec)
+            continue
+        for a in extract_unique_addresses(entry.get("text", "")):
+            rec = record_from_mapping(dict(entry, address=a))
+            if rec is not None:
+                records.append(rec)
+    return records
+
+
+def unique_record_addresses(records: List[Dict[str, str]]) -> List[str]:
     seen = set()
     uniq = []
-    for a in out:
-        a2 = norm(a)
-        if a2 and a2 not in seen:
-            seen.add(a2)
-            uniq.append(a2)
+    for rec in records:
+        a = rec["address"]
+        if a not in seen:
+            seen.add(a)
+            uniq.append(a)
     return uniq
 
 
-async def accept_common_banners(page: Page) -> None:
+def addresses_from_snapshot(kind: str, raw: str) -> List[str]:
+    if kind == "sidebar":
+        return extract_unique_addresses(raw)
+    if kind == "entries":
+        return unique_record_addresses(records_from_entries(json.loads(raw)))
+    if kind == "payload":
+        return unique_record_addresses(parse_locations_payload(raw))
+    raise ValueError(f"Unknown snapshot kind: {kind!r}")
+
+
+class SnapshotCache:
+    """Compressed raw query results, stored by content hash.
+
+    ``objects/`` holds each distinct snapshot once, gzip-compressed and named
+    by its SHA-256; ``refs/`` maps a (source, radius, seed) key to the object
+    plus the mode and time it was captured. ``get`` ignores refs older than
+    ``ttl_s`` (0 never reuses them), while ``entries`` returns all of them for
+    offline re-parsing.
+    """
+
+    def __init__(self, root: Path, ttl_s: float = SNAPSHOT_TTL_S) -> None:
+        self.root = root
+        self.ttl_s = ttl_s
+        self.hits = 0
+        (root / "objects").mkdir(parents=True, exist_ok=True)
+        (root / "refs").mkdir(parents=True, exist_ok=True)
+
+    def ref_path(self, seed: str, source: str, radius: str = RADIUS) -> Path:
+        key = hashlib.sha256(f"{source}\0{radius}\0{seed}".encode("utf-8")).hexdigest()
+        return self.root / "refs" / f"{key}.json"
+
+    def object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / f"{digest}.gz"
+
+    def put(self, seed: str, source: str, mode: str, kind: str, raw: str, radius: str = RADIUS) -> None:
+        data = raw.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        obj = self.object_path(digest)
+        if not obj.exists():
+            obj.parent.mkdir(exist_ok=True)
+            self._write_atomic(obj, gzip.compress(data))
+        ref = {
+            "seed": seed, "source": source, "radius": radius,
+            "mode": mode, "kind": kind, "object": digest, "ts": time.time(),
+        }
+        self._write_atomic(self.ref_path(seed, source, radius), json.dumps(ref).encode("utf-8"))
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        # Shard processes share the cache, so each writer needs its own temp file.
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=path.name, suffix=".tmp", delete=False) as f:
+            f.write(data)
+        Path(f.name).replace(path)
+
+    def read(self, ref: Dict) -> str:
+        return gzip.decompress(self.object_path(ref["object"]).read_bytes()).decode("utf-8")
+
+    def get(self, seed: str, source: str, radius: str = RADIUS) -> Optional[Tuple[str, str, str]]:
+        if self.ttl_s <= 0:
+            return None
+        try:
+            ref = json.loads(self.ref_path(seed, source, radius).read_text(encoding="utf-8"))
+            if time.time() - ref["ts"] > self.ttl_s:
+                return None
+            raw = self.read(ref)
+        except (OSError, ValueError, KeyError):
+            return None
+        self.hits += 1
+        return ref["mode"], ref["kind"], raw
+
+    def entries(self) -> List[Dict]:
+        refs = []
+        for path in (self.root / "refs").glob("*.json"):
+            try:
+                refs.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return sorted(refs, key=lambda ref: (ref["source"], ref["seed"]))
+
+
+async def accept_common_banners(page: Page) -> bool:
     for name in ("Accept", "I Agree", "Agree", "OK", "Got it"):
         try:
             await page.get_by_role("button", name=name).click(timeout=1200)
-            return
+            return True
         except Exception:
             pass
+    return False
 
 
 async def get_frame(page: Page) -> Frame:
@@ -115,7 +536,7 @@ async def get_frame(page: Page) -> Frame:
 
 async def ensure_radius_50(frame: Frame) -> None:
     await frame.wait_for_selector(RADIUS_SELECTOR, timeout=20000)
-    await frame.select_option(RADIUS_SELECTOR, value="50")
+    await frame.select_option(RADIUS_SELECTOR, value=RADIUS)
 
 
 async def sidebar_snapshot(frame: Frame) -> str:
@@ -126,52 +547,1050 @@ async def sidebar_snapshot(frame: Frame) -> str:
         return ""
 
 
-async def wait_sidebar_change(frame: Frame, before: str, timeout_ms: int = 12000) -> str:
-    deadline = frame.page.context._loop.time() + timeout_ms / 1000.0
-    while frame.page.context._loop.time() < deadline:
-        now = await sidebar_snapshot(frame)
-        if now and now != (before or ""):
-            return now
-        await frame.wait_for_timeout(120)
-    return await sidebar_snapshot(frame)
+WAIT_SIDEBAR_JS = """(read, before, timeoutMs) => new Promise((resolve) => {
+    let obs = null;
+    let timer = null;
+    const done = (value) => {
+        if (obs) obs.disconnect();
+        if (timer) clearTimeout(timer);
+        resolve(value);
+    };
+    const check = () => {
+        const now = read();
+        if (now && now !== before) {
+            done(now);
+            return true;
+        }
+        return false;
+    };
+    if (check()) return;
+    obs = new MutationObserver(() => { check(); });
+    obs.observe(document.body || document.documentElement, {
+        childList: true, subtree: true, characterData: true,
+    });
+    timer = setTimeout(() => done(read()), timeoutMs);
+})"""
+
+
+SIDEBAR_ENTRIES_JS = """(root) => {
+    const BLOCK = /^(BR|DIV|P|LI|TR|TABLE|UL|OL|H[1-6])$/;
+    const lines = (el) => {
+        const out = [];
+        let cur = "";
+        const walk = (n) => {
+            if (n.nodeType === 3) { cur += n.nodeValue; return; }
+            if (n.nodeType !== 1 || n.tagName === 'SCRIPT' || n.tagName === 'STYLE') return;
+            const block = BLOCK.test(n.tagName);
+            if (block) { out.push(cur); cur = ""; }
+            for (const c of n.childNodes) walk(c);
+            if (block) { out.push(cur); cur = ""; }
+        };
+        walk(el);
+        out.push(cur);
+        return out.map((s) => s.replace(/\\s+/g, ' ').trim()).filter(Boolean);
+    };
+    const anchor = /\\bCA\\s+9\\d{4}(?:-\\d{4})?\\b/i;
+    const noise = /\\(\\s*\\d+(?:\\.\\d+)?\\s*\\)\\s*miles?\\.?|Phone:.*$|Get\\s+Directions/gi;
+    let container = root;
+    while (container.children.length === 1) container = container.children[0];
+    const items = container.children.length ? Array.from(container.children) : [container];
+
+    return items.map((el) => {
+        const ls = lines(el);
+        const text = ls.join("\\n");
+        const bold = el.querySelector('b, strong');
+        const phone = text.match(/Phone:\\s*(\\(\\d{3}\\)\\s*\\d{3}-\\d{4})/i);
+        const distance = text.match(/\\(\\s*(\\d+(?:\\.\\d+)?)\\s*\\)\\s*miles?/i);
+
+        let address = "";
+        const i = ls.findIndex((l) => anchor.test(l));
+        if (i !== -1) {
+            address = ls[i].replace(noise, ' ').trim();
+            if (address.split(',').length < 3 && i > 0) {
+                address = ls[i - 1].replace(noise, ' ').trim() + ', ' + address;
+            }
+        }
+
+        return {
+            name: bold ? bold.textContent.trim() : (ls[0] || ""),
+            phone: phone ? phone[1] : "",
+            distance: distance ? distance[1] : "",
+            address: address,
+            text: address ? "" : text,
+        };
+    }).filter((e) => e.address || e.text);
+}"""
+
+
+QUERY_JS = """async (a) => {
+    const waitChange = %s;
+    const entries = %s;
+    const sidebar = () => document.querySelector(a.sidebar);
+    const signature = () => {
+        const el = sidebar();
+        return el ? el.textContent.trim() : "";
+    };
+    const payload = (status) => {
+        const el = sidebar();
+        if (a.extract === "dom") return { status, text: "", entries: el ? entries(el) : [] };
+        return { status, text: el ? el.innerText.trim() : "", entries: [] };
+    };
+
+    const radius = document.querySelector(a.radiusSelector);
+    if (radius && radius.value !== a.radius) {
+        radius.value = a.radius;
+        radius.dispatchEvent(new Event('input', { bubbles: true }));
+        radius.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    const before = signature();
+    const input = document.querySelector(a.input);
+    if (!input) return payload("failed");
+    input.value = a.q;
+    input.dispatchEvent(new Event('input', { bubbles: true }));
+    input.dispatchEvent(new Event('change', { bubbles: true }));
+
+    const changed = a.wait ? waitChange(signature, before, a.timeoutMs) : null;
+    if (typeof searchLocations === 'function') {
+        searchLocations();
+    } else {
+        const btn = document.querySelector(a.button);
+        if (btn) btn.click();
+    }
+    if (!a.wait) return { status: "ok", text: "", entries: [] };
+
+    const after = await changed;
+    return payload(after && after !== before ? "ok" : "failed");
+}""" % (WAIT_SIDEBAR_JS, SIDEBAR_ENTRIES_JS)
+
 
+def query_args(query: str, wait: bool, timeout_ms: int, extract: str = "text") -> Dict:
+    return {
+        "q": query,
+        "radius": RADIUS,
+        "radiusSelector": RADIUS_SELECTOR,
+        "input": INPUT_SELECTOR,
+        "button": BUTTON_SELECTOR,
+        "sidebar": SIDEBAR_SELECTOR,
+        "wait": wait,
+        "timeoutMs": timeout_ms,
+        "extract": extract,
+    }
 
-async def trigger_search_fast(frame: Frame) -> None:
+
+async def set_query_and_search_fast(
+    frame: Frame,
+    query: str,
+    timeout_ms: int = 12000,
+    extract: str = "text",
+) -> Tuple[str, str, List[Dict[str, str]]]:
     try:
-        has_fn = await frame.evaluate("() => (typeof searchLocations === 'function')")
+        res = await frame.evaluate(QUERY_JS, arg=query_args(query, True, timeout_ms, extract))
+        return res["status"], res["text"], res["entries"]
     except Exception:
-        has_fn = False
+        return "failed", await sidebar_snapshot(frame), []
 
-    if has_fn:
-        await frame.evaluate("() => { searchLocations(); }")
-    else:
-        await frame.wait_for_selector(BUTTON_SELECTOR, timeout=15000)
-        await frame.evaluate(
-            """() => {
-                const btn = document.querySelector('input[type="button"][value="Find Providers"]');
-                if (btn) btn.click();
-            }"""
-        )
 
+async def search_and_capture(
+    frame: Frame,
+    query: str,
+    data_url: re.Pattern,
+    timeout_ms: int = 12000,
+) -> Optional[str]:
+    try:
+        async with frame.page.expect_response(
+            lambda r: bool(data_url.search(r.url)) and r.ok,
+            timeout=timeout_ms,
+        ) as resp_info:
+            await frame.evaluate(QUERY_JS, arg=query_args(query, False, timeout_ms))
+        resp = await resp_info.value
+        return await resp.text()
+    except Exception:
+        return None
+
+
+async def query_seed(
+    frame: Frame,
+    z: str,
+    source: str,
+    data_url: re.Pattern,
+    parser: Optional[Executor] = None,
+    diff: Optional[SidebarDiff] = None,
+    snapshots: Optional[SnapshotCache] = None,
+) -> Tuple[str, Union[List[str], Awaitable[List[str]]]]:
+    if source == "network":
+        for mode, q in (("zip", z), ("zip_ca", f"{z}, CA")):
+            body = await search_and_capture(frame, q, data_url)
+            if body is None:
+                continue
+            try:
+                addrs = addresses_from_snapshot("payload", body)
+            except (ValueError, ET.ParseError):
+                continue
+            if snapshots is not None:
+                snapshots.put(z, source, mode, "payload", body)
+            return mode, addrs
+        return "failed", []
+
+    extract = "dom" if source == "dom" else "text"
+    mode1, sidebar_text, entries = await set_query_and_search_fast(frame, z, extract=extract)
+    mode = "zip" if mode1 == "ok" else "failed"
+
+    if mode1 == "failed":
+        mode2, sidebar_text, entries = await set_query_and_search_fast(frame, f"{z}, CA", extract=extract)
+        mode = "zip_ca" if mode2 == "ok" else "failed"
+
+    if snapshots is not None and mode != "failed" and (entries or sidebar_text):
+        if entries:
+            snapshots.put(z, source, mode, "entries", json.dumps(entries))
+        else:
+            snapshots.put(z, source, mode, "sidebar", sidebar_text)
+
+    if entries:
+        return mode, unique_record_addresses(records_from_entries(entries))
+    if not sidebar_text:
+        return mode, []
+    if diff is not None:
+        keys, known, fresh = diff.split(sidebar_text)
+        if parser is None:
+            return mode, diff.commit(keys, known, dict(zip(fresh, parse_entry_blocks(list(fresh.values())))))
+        pending = asyncio.get_running_loop().run_in_executor(parser, parse_entry_blocks, list(fresh.values()))
+        return mode, diff.commit_pending(keys, known, fresh, pending)
+    if parser is not None:
+        return mode, asyncio.get_running_loop().run_in_executor(parser, extract_unique_addresses, sidebar_text)
+    return mode, extract_unique_addresses(sidebar_text)
+
+
+def load_zip_centroids(path: str) -> Dict[str, Tuple[str, str]]:
+    centroids: Dict[str, Tuple[str, str]] = {}
+    with Path(path).expanduser().open(newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            z = row.get("zip") or row.get("zipcode") or ""
+            lat = row.get("lat") or row.get("latitude") or ""
+            lng = row.get("lng") or row.get("lon") or row.get("longitude") or ""
+            if z and lat and lng:
+                centroids[z.zfill(5)] = (lat, lng)
+    return centroids
+
+
+def build_data_url(
+    template: str,
+    query: str,
+    z: str,
+    centroids: Optional[Dict[str, Tuple[str, str]]],
+) -> Optional[str]:
+    lat, lng = "", ""
+    if "{lat}" in template or "{lng}" in template:
+        if not centroids or z not in centroids:
+            return None
+        lat, lng = centroids[z]
+    return template.format(query=quote(query), zip=z, radius=RADIUS, lat=lat, lng=lng)
+
+
+class HttpPool:
+    def __init__(self, base_url: str, size: int, delay_ms: int = 0, timeout_s: float = 30.0) -> None:
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.netloc = parts.netloc
+        self.delay_s = max(delay_ms, 0) / 1000.0
+        self.timeout_s = timeout_s
+        self.idle: "asyncio.Queue[Optional[http.client.HTTPConnection]]" = asyncio.Queue()
+        for _ in range(max(size, 1)):
+            self.idle.put_nowait(None)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.netloc, timeout=self.timeout_s)
+
+    def _request(
+        self,
+        conn: Optional[http.client.HTTPConnection],
+        target: str,
+    ) -> Tuple[Optional[http.client.HTTPConnection], int, str]:
+        for attempt in (0, 1):
+            if conn is None:
+                conn = self._connect()
+            try:
+                conn.request("GET", target, headers=HTTP_HEADERS)
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                conn = None
+                if attempt:
+                    raise
+
+        charset = resp.headers.get_content_charset() or "utf-8"
+        if resp.will_close:
+            conn.close()
+            conn = None
+        return conn, resp.status, body.decode(charset, errors="replace")
+
+    async def get(self, url: str) -> Tuple[int, str]:
+        parts = urlsplit(url)
+        target = parts.path or "/"
+        if parts.query:
+            target += "?" + parts.query
+
+        conn = await self.idle.get()
+        try:
+            conn, status, body = await asyncio.to_thread(self._request, conn, target)
+            if self.delay_s:
+                await asyncio.sleep(self.delay_s)
+            return status, body
+        except Exception:
+            conn = None
+            raise
+        finally:
+            self.idle.put_nowait(conn)
+
+    def close(self) -> None:
+        while not self.idle.empty():
+            conn = self.idle.get_nowait()
+            if conn is not None:
+                conn.close()
+
+
+async def fetch_seed_http(
+    pool: HttpPool,
+    template: str,
+    z: str,
+    centroids: Optional[Dict[str, Tuple[str, str]]],
+    snapshots: Optional[SnapshotCache] = None,
+) -> Tuple[str, List[str]]:
+    if snapshots is not None:
+        hit = snapshots.get(z, "http")
+        if hit is not None:
+            mode, kind, raw = hit
+            return mode, addresses_from_snapshot(kind, raw)
+
+    for mode, q in (("zip", z), ("zip_ca", f"{z}, CA")):
+        url = build_data_url(template, q, z, centroids)
+        if url is None:
+            break
+        try:
+            status, body = await pool.get(url)
+            if status == 200:
+                addrs = addresses_from_snapshot("payload", body)
+                if snapshots is not None:
+                    snapshots.put(z, "http", mode, "payload", body)
+                return mode, addrs
+        except (http.client.HTTPException, OSError, ValueError, ET.ParseError):
+            pass
+        if "{query}" not in template:
+            break
+    return "failed", []
+
+
+class SeenIndex(Protocol):
+    def __contains__(self, address: object) -> bool: ...
+
+    def add(self, address: str) -> None: ...
+
+    def __len__(self) -> int: ...
+
+
+class DigestSeenIndex:
+    MAX_LOAD = 0.7
+
+    def __init__(self, capacity: int = 1 << 16) -> None:
+        size = 1 << max(capacity - 1, 1).bit_length()
+        self.slots = array("Q", bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+
+    @staticmethod
+    def digest(address: str) -> int:
+        d = int.from_bytes(hashlib.blake2b(address.encode("utf-8"), digest_size=8).digest(), "little")
+        return d or 1
+
+    def _find(self, d: int) -> int:
+        slots, mask = self.slots, self.mask
+        i = d & mask
+        while slots[i] and slots[i] != d:
+            i = (i + 1) & mask
+        return i
+
+    def __contains__(self, address: object) -> bool:
+        if not isinstance(address, str):
+            return False
+        d = self.digest(address)
+        return self.slots[self._find(d)] == d
+
+    def add(self, address: str) -> None:
+        d = self.digest(address)
+        i = self._find(d)
+        if self.slots[i] == d:
+            return
+        self.slots[i] = d
+        self.count += 1
+        if self.count > self.MAX_LOAD * len(self.slots):
+            self._grow()
+
+    def _grow(self) -> None:
+        old = self.slots
+        self.slots = array("Q", bytes(16 * len(old)))
+        self.mask = len(self.slots) - 1
+        for d in old:
+            if d:
+                self.slots[self._find(d)] = d
+
+    def __len__(self) -> int:
+        return self.count
+
+    def nbytes(self) -> int:
+        return self.slots.itemsize * len(self.slots)
+
+
+def make_seen_index(kind: str) -> SeenIndex:
+    if kind == "digest":
+        return DigestSeenIndex()
+    if kind == "exact":
+        return set()
+    raise ValueError(f"Unknown seen index: {kind!r}")
+
+
+class SeedJournal:
+    """Append-only JSON-lines record of finished seeds.
+
+    Entries are written by the sink right after the addresses they cover, so
+    a journaled seed never has results still sitting in a buffer. Entries are
+    tagged with the result source (or "http"), and only matching ones count as
+    done. Once a run gets through all its seeds ``rotate`` moves the file to
+    ``.prev``, so only an interrupted run is resumed and the next crawl starts
+    fresh.
+    """
+
+    def __init__(self, path: Path, source: str) -> None:
+        self.path = path
+        self.source = source
+        self.pending: List[str] = []
+        self._file = None
+
+    def completed(self) -> Dict[str, str]:
+        done: Dict[str, str] = {}
+        if not self.path.exists():
+            return done
+        with self.path.open(encoding="utf-8") as f:
+            for ln in f:
+                try:
+                    entry = json.loads(ln)
+                except ValueError:
+                    continue
+                if entry.get("source") == self.source and entry.get("mode") != "failed":
+                    done[entry["query"]] = entry["mode"]
+        return done
+
+    def rotate(self) -> Optional[Path]:
+        if not self.path.exists():
+            return None
+        prev = self.path.with_name(self.path.name + ".prev")
+        self.path.replace(prev)
+        return prev
+
+    def open(self) -> None:
+        torn = False
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with self.path.open("rb") as f:
+                f.seek(-1, 2)
+                torn = f.read(1) != b"\n"
+        self._file = self.path.open("a", encoding="utf-8")
+        if torn:
+            self._file.write("\n")
 
-async def set_query_and_search_fast(frame: Frame, query: str) -> str:
+    def close(self) -> None:
+        self._file.close()
+        self._file = None
+
+    def add(self, z: str, mode: str, found: int, new: int, ts: float) -> None:
+        self.pending.append(json.dumps({
+            "query": z, "source": self.source, "mode": mode, "found": found, "new": new, "ts": round(ts, 3),
+        }))
+
+    def take(self) -> List[str]:
+        entries, self.pending = self.pending, []
+        return entries
+
+    def write(self, entries: List[str]) -> None:
+        if not entries or self._file is None:
+            return
+        self._file.write("".join(entry + "\n" for entry in entries))
+        self._file.flush()
+
+
+class BufferedSink(ABC):
+    """Single buffered writer for crawl results.
+
+    New addresses are kept in memory and written in one batch once
+    ``flush_rows`` are pending or every ``flush_seconds`` from a background
+    task; leaving the ``async with`` block flushes whatever is left. Only the
+    sink touches the output, so parallel workers can't interleave records.
+    """
+
+    def __init__(
+        self,
+        flush_rows: int = SINK_FLUSH_ROWS,
+        flush_seconds: float = SINK_FLUSH_SECONDS,
+        journal: Optional[SeedJournal] = None,
+    ) -> None:
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.journal = journal
+        self.pending: List[Tuple[str, str, float]] = []
+        self.inflight = 0
+        self.written = 0
+        self._flusher: Optional["asyncio.Task[None]"] = None
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    @abstractmethod
+    async def new_addresses(self, addrs: List[str]) -> List[str]: ...
+
+    @abstractmethod
+    async def write(self, rows: List[Tuple[str, str, float]]) -> None: ...
+
+    async def open(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def __aenter__(self) -> "BufferedSink":
+        await self.open()
+        if self.journal is not None:
+            self.journal.open()
+        if self.flush_seconds > 0:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        await self.close()
+        if self.journal is not None:
+            self.journal.close()
+
+    async def _flush_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def add(self, i: int, z: str, mode: str, addrs: List[str]) -> None:
+        new_addrs = await self.new_addresses(addrs)
+        now = time.time()
+        self.pending.extend((a, z, now) for a in new_addrs)
+        if self.journal is not None:
+            self.journal.add(z, mode, len(addrs), len(new_addrs), now)
+        if len(self.pending) >= self.flush_rows:
+            await self.flush()
+
+        report = [f"NEW: {a}" for a in new_addrs]
+        report.append(f"[{i+1}] zip={z} mode={mode} found={len(addrs)} unique={len(self)} +{len(new_addrs)}")
+        print("\n".join(report))
+
+    async def flush(self) -> None:
+        # Take the journal entries together with the rows they cover, so a
+        # seed is only journaled once its own rows are written.
+        rows, self.pending = self.pending, []
+        entries = self.journal.take() if self.journal is not None else []
+        if rows:
+            self.inflight += len(rows)
+            try:
+                await self.write(rows)
+            finally:
+                self.inflight -= len(rows)
+            self.written += len(rows)
+        if entries:
+            self.journal.write(entries)
+
+
+class CsvSink(BufferedSink):
+    def __init__(
+        self,
+        out_path: Path,
+        seen: SeenIndex,
+        flush_rows: int = SINK_FLUSH_ROWS,
+        flush_seconds: float = SINK_FLUSH_SECONDS,
+        journal: Optional[SeedJournal] = None,
+    ) -> None:
+        super().__init__(flush_rows, flush_seconds, journal)
+        self.out_path = out_path
+        self.seen = seen
+        self._file = None
+
+    def __len__(self) -> int:
+        return len(self.seen)
+
+    async def open(self) -> None:
+        if not self.out_path.exists():
+            self.out_path.write_text("address\n", encoding="utf-8")
+        self._file = self.out_path.open("a", encoding="utf-8")
+
+    async def close(self) -> None:
+        self._file.close()
+        self._file = None
+
+    async def new_addresses(self, addrs: List[str]) -> List[str]:
+        new_addrs: List[str] = []
+        for a in addrs:
+            a_clean = norm(a)
+            if a_clean not in self.seen:
+                self.seen.add(a_clean)
+                new_addrs.append(a_clean)
+        return new_addrs
+
+    async def write(self, rows: List[Tuple[str, str, float]]) -> None:
+        self._file.write("".join(a + "\n" for a, _, _ in rows))
+        self._file.flush()
+
+
+STORE_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS addresses (address TEXT NOT NULL, seed TEXT NOT NULL, first_seen REAL NOT NULL)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS addresses_address ON addresses (address)",
+)
+
+
+def open_store(db_path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(db_path), timeout=STORE_BUSY_TIMEOUT_S, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        for stmt in STORE_SCHEMA:
+            conn.execute(stmt)
+    return conn
+
+
+class SqliteSink(BufferedSink):
+    """Result store in SQLite, one row per normalized address.
+
+    The unique index does the dedupe: resume is an index lookup per result
+    instead of loading every address, and several workers or shard processes
+    can share one WAL-mode file, each flush being a single INSERT OR IGNORE
+    transaction. Queries run in a worker thread so waiting on another
+    process's lock never stalls the event loop.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        flush_rows: int = SINK_FLUSH_ROWS,
+        flush_seconds: float = SINK_FLUSH_SECONDS,
+        journal: Optional[SeedJournal] = None,
+    ) -> None:
+        super().__init__(flush_rows, flush_seconds, journal)
+        self.db_path = db_path
+        self.conn = open_store(db_path, check_same_thread=False)
+        self.count = self.conn.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
+        self._lock = threading.Lock()
+        self._pending_addrs: set = set()
+
+    def __len__(self) -> int:
+        return self.count + len(self.pending) + self.inflight
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.conn.close)
+
+    def _known(self, cleaned: List[str]) -> set:
+        known = set()
+        with self._lock:
+            for k in range(0, len(cleaned), STORE_LOOKUP_CHUNK):
+                chunk = cleaned[k:k + STORE_LOOKUP_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                sql = f"SELECT address FROM addresses WHERE address IN ({marks})"
+                known.update(row[0] for row in self.conn.execute(sql, chunk))
+        return known
+
+    def _insert(self, rows: List[Tuple[str, str, float]]) -> int:
+        with self._lock:
+            before = self.conn.total_changes
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO addresses (address, seed, first_seen) VALUES (?, ?, ?)", rows
+                )
+            return self.conn.total_changes - before
+
+    async def new_addresses(self, addrs: List[str]) -> List[str]:
+        cleaned = [a for a in dict.fromkeys(norm(a) for a in addrs) if a not in self._pending_addrs]
+        known = await asyncio.to_thread(self._known, cleaned) if cleaned else set()
+        new_addrs = [a for a in cleaned if a not in known and a not in self._pending_addrs]
+        self._pending_addrs.update(new_addrs)
+        return new_addrs
+
+    async def write(self, rows: List[Tuple[str, str, float]]) -> None:
+        try:
+            self.count += await asyncio.to_thread(self._insert, rows)
+        finally:
+            self._pending_addrs.difference_update(a for a, _, _ in rows)
+
+
+def export_store_csv(db_path: Path, out_path: Path) -> int:
+    conn = open_store(db_path)
+    n = 0
+    try:
+        with out_path.open("w", encoding="utf-8") as f:
+            f.write("address\n")
+            for (a,) in conn.execute("SELECT address FROM addresses ORDER BY rowid"):
+                f.write(a + "\n")
+                n += 1
+    finally:
+        conn.close()
+    return n
+
+
+def address_zip5(address: str) -> str:
+    m = ADDRESS_SPLIT.match(address)
+    return m.group("zip")[:5] if m else ""
+
+
+def export_store_columnar(db_path: Path, out_path: Path, row_group_rows: int = EXPORT_ROW_GROUP) -> int:
+    """Write the store as typed columns to Parquet, or Arrow IPC for .arrow/.feather.
+
+    Rows are sorted by ZIP and written ``row_group_rows`` at a time, so each
+    row group covers a narrow ZIP range and readers can skip the rest.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Columnar export requires pyarrow (pip install pyarrow).") from e
+
+    schema = pa.schema([
+        ("address", pa.string()),
+        ("street", pa.string()),
+        ("city", pa.string()),
+        ("state", pa.string()),
+        ("zip5", pa.string()),
+        ("zip4", pa.string()),
+        ("seed", pa.string()),
+        ("first_seen", pa.timestamp("ms", tz="UTC")),
+    ])
+    ipc = out_path.suffix.lower() in (".arrow", ".feather", ".ipc")
+
+    conn = open_store(db_path)
+    conn.create_function("zip5", 1, address_zip5, deterministic=True)
+    writer = pa.ipc.new_file(str(out_path), schema) if ipc else pq.ParquetWriter(str(out_path), schema)
+    n = 0
+    try:
+        cur = conn.execute("SELECT address, seed, first_seen FROM addresses ORDER BY zip5(address), rowid")
+        while True:
+            rows = cur.fetchmany(row_group_rows)
+            if not rows:
+                break
+            cols: Dict[str, List] = {name: [] for name in schema.names}
+            for address, seed, first_seen in rows:
+                parts = split_address(address) or {}
+                zip_code = parts.get("zip", "")
+                cols["address"].append(address)
+                cols["street"].append(parts.get("street"))
+                cols["city"].append(parts.get("city"))
+                cols["state"].append(parts.get("state"))
+                cols["zip5"].append(zip_code[:5] or None)
+                cols["zip4"].append(zip_code[6:] or None)
+                cols["seed"].append(seed)
+                cols["first_seen"].append(int(first_seen * 1000))
+            table = pa.Table.from_pydict(cols, schema=schema)
+            if ipc:
+                writer.write_table(table)
+            else:
+                writer.write_table(table, row_group_size=row_group_rows)
+            n += len(rows)
+    finally:
+        writer.close()
+        conn.close()
+    return n
+
+
+async def crawl_http(
+    seeds: List[Tuple[int, str]],
+    sink: BufferedSink,
+    template: str,
+    centroids: Optional[Dict[str, Tuple[str, str]]],
+    connections: int,
+    delay_ms: int,
+    snapshots: Optional[SnapshotCache] = None,
+) -> None:
+    pool = HttpPool(template, size=connections, delay_ms=delay_ms)
+
+    async def one(i: int, z: str) -> SeedResult:
+        mode, addrs = await fetch_seed_http(pool, template, z, centroids, snapshots)
+        return i, z, mode, addrs
+
+    try:
+        for fut in asyncio.as_completed([one(i, z) for i, z in seeds]):
+            i, z, mode, addrs = await fut
+            await sink.add(i, z, mode, addrs)
+    finally:
+        pool.close()
+
+
+def load_seen(out_path: Path, kind: str = "exact") -> SeenIndex:
+    seen = make_seen_index(kind)
+    if out_path.exists():
+        with out_path.open(encoding="utf-8") as f:
+            next(f, None)
+            for ln in f:
+                ln = ln.strip()
+                if ln:
+                    seen.add(ln)
+    return seen
+
+
+def shard_path(out_path: Path, shard_index: int, shard_count: int) -> Path:
+    return out_path.with_name(f"{out_path.stem}.shard{shard_index + 1}of{shard_count}{out_path.suffix}")
+
+
+def merge_outputs(shard_paths: List[Path], out_path: Path, seen_index: str = "exact") -> int:
+    seen = load_seen(out_path, seen_index)
+    if not out_path.exists():
+        out_path.write_text("address\n", encoding="utf-8")
+
+    added = 0
+    with out_path.open("a", encoding="utf-8") as out:
+        for sp in shard_paths:
+            if not sp.exists():
+                continue
+            with sp.open(encoding="utf-8") as f:
+                next(f, None)
+                for ln in f:
+                    a = norm(ln)
+                    if a and a not in seen:
+                        seen.add(a)
+                        out.write(a + "\n")
+                        added += 1
+    return added
+
+
+def _run_shard(kwargs: Dict) -> None:
+    asyncio.run(run(**kwargs))
+
+
+def run_sharded(shards: int, out_csv: str, **kwargs) -> None:
+    out_path = Path(out_csv).expanduser().resolve()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    shard_paths = [shard_path(out_path, k, shards) for k in range(shards)]
+
+    jobs = [
+        dict(kwargs, out_csv=str(sp), shard_index=k, shard_count=shards)
+        for k, sp in enumerate(shard_paths)
+    ]
+    if kwargs.get("profile_dir"):
+        for k, job in enumerate(jobs):
+            job["profile_dir"] = str(Path(kwargs["profile_dir"]) / f"shard{k + 1}")
+    with ProcessPoolExecutor(max_workers=shards, mp_context=multiprocessing.get_context("spawn")) as ex:
+        for fut in [ex.submit(_run_shard, job) for job in jobs]:
+            fut.result()
+
+    if kwargs.get("store"):
+        print(f"{shards} shards wrote to {kwargs['store']}")
+        return
+    added = merge_outputs(shard_paths, out_path, kwargs.get("seen_index", "exact"))
+    print(f"Merged {len(shard_paths)} shards into {out_path}: +{added}")
+
+
+def host_matches(host: str, suffixes: Sequence[str]) -> bool:
+    return any(host == h or host.endswith("." + h) for h in suffixes)
+
+
+def should_block(
+    url: str,
+    resource_type: str,
+    block_types: Sequence[str],
+    block_hosts: Sequence[str],
+    allow_hosts: Sequence[str],
+) -> bool:
+    host = (urlsplit(url).hostname or "").lower()
+    if host_matches(host, allow_hosts):
+        return False
+    return resource_type in block_types or host_matches(host, block_hosts)
+
+
+async def apply_blocking(
+    context: BrowserContext,
+    block_types: Sequence[str],
+    block_hosts: Sequence[str],
+    allow_hosts: Sequence[str],
+) -> Dict[str, int]:
+    stats = {"blocked": 0, "allowed": 0}
+
+    async def handle(route: Route) -> None:
+        req = route.request
+        if should_block(req.url, req.resource_type, block_types, block_hosts, allow_hosts):
+            stats["blocked"] += 1
+            await route.abort()
+        else:
+            stats["allowed"] += 1
+            await route.continue_()
+
+    await context.route("**/*", handle)
+    return stats
+
+
+def split_list_arg(value: str) -> Tuple[str, ...]:
+    return tuple(v.strip().lower() for v in value.split(",") if v.strip())
+
+
+async def open_locator(
+    page: Page,
+    reload: bool = False,
+    frame_url: Optional[str] = None,
+    banner_marker: Optional[Path] = None,
+) -> Frame:
+    if frame_url:
+        await page.goto(frame_url, wait_until="domcontentloaded")
+        frame = page.main_frame
+    else:
+        if reload:
+            await page.reload(wait_until="domcontentloaded")
+        else:
+            await page.goto(URL, wait_until="domcontentloaded")
+        if banner_marker is None or not banner_marker.exists():
+            if await accept_common_banners(page) and banner_marker is not None:
+                banner_marker.touch()
+        frame = await get_frame(page)
+
+    await frame.wait_for_selector(INPUT_SELECTOR, timeout=30000)
     await ensure_radius_50(frame)
-    before = await sidebar_snapshot(frame)
-
-    await frame.evaluate(
-        """(q) => {
-            const el = document.querySelector('#addressInput');
-            if (!el) return;
-            el.value = q;
-            el.dispatchEvent(new Event('input', { bubbles: true }));
-            el.dispatchEvent(new Event('change', { bubbles: true }));
-        }""",
-        arg=query,
-    )
+    return frame
+
+
+class RecyclePolicy(NamedTuple):
+    heap_mb: float = 256.0
+    nodes: int = 20000
+    latency_factor: float = 2.5
+
+
+async def browser_worker(
+    wid: int,
+    page: Page,
+    seeds: "asyncio.Queue[Tuple[int, str]]",
+    results: "asyncio.Queue[Optional[PendingResult]]",
+    source: str,
+    data_url: re.Pattern,
+    reload_every: int,
+    delay_ms: int,
+    frame_url: Optional[str] = None,
+    banner_marker: Optional[Path] = None,
+    recycle: RecyclePolicy = RecyclePolicy(),
+    parser: Optional[Executor] = None,
+    diff: Optional[SidebarDiff] = None,
+    snapshots: Optional[SnapshotCache] = None,
+) -> None:
+    frame = await open_locator(page, frame_url=frame_url, banner_marker=banner_marker)
+    cdp = await open_metrics_session(page)
+    loop = asyncio.get_running_loop()
+    done = 0
+    since_reload = 0
+    latencies: List[float] = []
+    reason: Optional[str] = None
+
+    while True:
+        try:
+            i, z = seeds.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        # Served from the snapshot cache: no page work, so no latency sample,
+        # reload accounting or throttle.
+        hit = snapshots.get(z, source) if snapshots is not None else None
+        if hit is not None:
+            mode, kind, raw = hit
+            results.put_nowait((i, z, mode, addresses_from_snapshot(kind, raw)))
+            done += 1
+            continue
+
+        if since_reload > 0 and reload_every > 0 and since_reload >= reload_every:
+            reason = f"limit={reload_every}"
+        if reason:
+            print(f"[reload] worker={wid} after {done} queries ({reason})")
+            frame = await open_locator(page, reload=True, frame_url=frame_url, banner_marker=banner_marker)
+            since_reload = 0
+            latencies = []
+            reason = None
+
+        t0 = loop.time()
+        mode, addrs = await query_seed(frame, z, source, data_url, parser, diff, snapshots)
+        latencies.append(loop.time() - t0)
+        if diff is not None and mode != "failed" and diff.last_fresh == 0:
+            print(f"[{i+1}] zip={z} nothing new (all entry blocks seen)")
+        results.put_nowait((i, z, mode, addrs))
+        done += 1
+        since_reload += 1
+
+        if cdp is not None and since_reload % RECYCLE_CHECK_EVERY == 0:
+            reason = recycle_reason(await page_metrics(cdp), latencies, recycle)
 
-    await trigger_search_fast(frame)
-    after = await wait_sidebar_change(frame, before, timeout_ms=12000)
-    return "ok" if after and after != before else "failed"
+        if delay_ms > 0:
+            await page.wait_for_timeout(delay_ms)
+
+
+async def open_metrics_session(page: Page) -> Optional[CDPSession]:
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Performance.enable")
+        return cdp
+    except Exception:
+        return None
+
+
+async def page_metrics(cdp: CDPSession) -> Dict[str, float]:
+    try:
+        res = await cdp.send("Performance.getMetrics")
+    except Exception:
+        return {}
+    return {m["name"]: m["value"] for m in res.get("metrics", [])}
+
+
+def recycle_reason(metrics: Dict[str, float], latencies: List[float], recycle: RecyclePolicy) -> Optional[str]:
+    heap_mb = metrics.get("JSHeapUsedSize", 0.0) / (1024 * 1024)
+    if recycle.heap_mb > 0 and heap_mb > recycle.heap_mb:
+        return f"heap={heap_mb:.0f}MB"
+
+    nodes = int(metrics.get("Nodes", 0))
+    if recycle.nodes > 0 and nodes > recycle.nodes:
+        return f"nodes={nodes}"
+
+    if recycle.latency_factor > 0 and len(latencies) >= 2 * RECYCLE_WINDOW:
+        baseline = median(latencies[:RECYCLE_WINDOW])
+        recent = median(latencies[-RECYCLE_WINDOW:])
+        if baseline > 0 and recent > recycle.latency_factor * baseline:
+            return f"latency={recent:.2f}s/{baseline:.2f}s"
+
+    return None
+
+
+async def write_results(
+    results: "asyncio.Queue[Optional[PendingResult]]",
+    sink: BufferedSink,
+) -> None:
+    while True:
+        item = await results.get()
+        if item is None:
+            return
+        i, z, mode, addrs = item
+        if not isinstance(addrs, list):
+            addrs = await addrs
+        await sink.add(i, z, mode, addrs)
+
+
+async def reparse_snapshots(snapshots: SnapshotCache, sink: BufferedSink) -> int:
+    refs = snapshots.entries()
+    async with sink:
+        for i, ref in enumerate(refs):
+            try:
+                addrs = addresses_from_snapshot(ref["kind"], snapshots.read(ref))
+            except (OSError, ValueError, ET.ParseError):
+                print(f"[reparse] unreadable snapshot seed={ref['seed']} source={ref['source']}")
+                continue
+            await sink.add(i, ref["seed"], ref["mode"], addrs)
+    return len(refs)
 
 
 async def run(
@@ -181,75 +1600,210 @@ async def run(
     max_queries: Optional[int],
     zip_step: int,
     reload_every: int,
+    source: str = "sidebar",
+    data_url_pattern: str = DATA_URL_PATTERN,
+    engine: str = "browser",
+    data_url_template: Optional[str] = None,
+    zip_centroids: Optional[str] = None,
+    http_connections: int = 8,
+    workers: int = 1,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    block_resources: bool = False,
+    block_types: Sequence[str] = BLOCK_RESOURCE_TYPES,
+    block_hosts: Sequence[str] = BLOCK_HOSTS,
+    allow_hosts: Sequence[str] = (),
+    direct_frame: bool = False,
+    frame_url: Optional[str] = None,
+    profile_dir: Optional[str] = None,
+    recycle: RecyclePolicy = RecyclePolicy(),
+    parse_workers: int = 0,
+    parse_cache_size: int = PARSE_CACHE_SIZE,
+    seen_index: str = "exact",
+    block_cache_size: int = BLOCK_CACHE_SIZE,
+    flush_rows: int = SINK_FLUSH_ROWS,
+    flush_seconds: float = SINK_FLUSH_SECONDS,
+    store: Optional[str] = None,
+    journal: bool = True,
+    snapshot_dir: Optional[str] = None,
+    snapshot_ttl_s: float = SNAPSHOT_TTL_S,
+    reparse: bool = False,
+    overwrite: bool = False,
 ) -> None:
+    set_parse_cache_size(parse_cache_size)
+    if engine == "http" and not data_url_template:
+        raise ValueError("engine='http' requires data_url_template.")
+
+    data_url = re.compile(data_url_pattern, re.IGNORECASE)
     out_path = Path(out_csv).expanduser().resolve()
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    seen: Set[str] = set()
-    if out_path.exists():
-        for ln in out_path.read_text(encoding="utf-8").splitlines()[1:]:
-            ln = ln.strip()
-            if ln:
-                seen.add(ln)
+    snapshots = None
+    if snapshot_dir:
+        snapshots = SnapshotCache(Path(snapshot_dir).expanduser().resolve(), snapshot_ttl_s)
+    elif reparse:
+        raise ValueError("reparse requires snapshot_dir.")
 
-    if not out_path.exists():
-        out_path.write_text("address\n", encoding="utf-8")
+    if reparse:
+        # A rebuild must not inherit strings an older parser produced.
+        target = Path(store).expanduser().resolve() if store else out_path
+        if target.exists():
+            if not overwrite:
+                raise ValueError(f"reparse rebuilds {target} from scratch; it already exists (pass overwrite).")
+            for stale in (target, target.with_name(target.name + "-wal"), target.with_name(target.name + "-shm")):
+                stale.unlink(missing_ok=True)
+
+    journal = journal and not reparse
+    seed_journal = None
+    if journal:
+        seed_journal = SeedJournal(out_path.with_name(out_path.name + ".journal"), "http" if engine == "http" else source)
+    if store:
+        store_path = Path(store).expanduser().resolve()
+        store_path.parent.mkdir(parents=True, exist_ok=True)
+        sink: BufferedSink = SqliteSink(store_path, flush_rows, flush_seconds, seed_journal)
+        resume = f"store {store_path}"
+    else:
+        t0 = time.perf_counter()
+        sink = CsvSink(out_path, load_seen(out_path, seen_index), flush_rows, flush_seconds, seed_journal)
+        resume = f"{seen_index} index, {time.perf_counter() - t0:.2f}s"
+
+    if reparse:
+        t0 = time.perf_counter()
+        n = await reparse_snapshots(snapshots, sink)
+        print(f"Reparsed {n} snapshots from {snapshots.root} in {time.perf_counter() - t0:.2f}s: "
+              f"+{sink.written} -> {store_path if store else out_path}")
+        return
 
     zips = generate_ca_zip_seeds(step=zip_step, jitter=True)
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=headless)
-        context = await browser.new_context()
-        page = await context.new_page()
+    if max_queries is not None:
+        zips = zips[:max_queries]
+    if shard_count > 1:
+        zips = zips[shard_index::shard_count]
+        print(f"Shard: {shard_index + 1}/{shard_count}")
 
-        await page.goto(URL, wait_until="domcontentloaded")
-        await accept_common_banners(page)
+    todo = list(enumerate(zips))
+    if seed_journal is not None:
+        done = seed_journal.completed()
+        todo = [(i, z) for i, z in todo if z not in done]
+        if done:
+            print(f"Journal: skipping {len(zips) - len(todo)} completed seeds ({seed_journal.path})")
 
-        frame = await get_frame(page)
-        await frame.wait_for_selector(INPUT_SELECTOR, timeout=30000)
-        await ensure_radius_50(frame)
+    if engine == "http":
+        centroids = load_zip_centroids(zip_centroids) if zip_centroids else None
 
-        print(f"Output CSV: {out_path}")
+        print(f"Output: {store_path if store else out_path}")
         print(f"CA ZIP seeds: {len(zips)} (step={zip_step})")
-        print(f"Existing addresses loaded: {len(seen)}")
+        print(f"Existing addresses loaded: {len(sink)} ({resume})")
+        print(f"HTTP engine: {urlsplit(data_url_template).netloc} x{http_connections}")
 
-        for i, z in enumerate(zips):
-            if max_queries is not None and i >= max_queries:
-                break
+        async with sink:
+            await crawl_http(todo, sink, data_url_template, centroids, http_connections, delay_ms, snapshots)
+        if seed_journal is not None:
+            print(f"Journal: all seeds done, rotated to {seed_journal.rotate()}")
+        return
+
+    parser = None
+    if parse_workers > 0:
+        parser = ProcessPoolExecutor(
+            max_workers=parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=set_parse_cache_size,
+            initargs=(parse_cache_size,),
+        )
+        print(f"Parse workers: {parse_workers}")
+
+    try:
+        async with async_playwright() as p:
+            banner_marker = None
+            frame_url_file = None
+            if profile_dir:
+                profile_path = Path(profile_dir).expanduser().resolve()
+                profile_path.mkdir(parents=True, exist_ok=True)
+                banner_marker = profile_path / "banners_accepted"
+                frame_url_file = profile_path / "frame_url"
+                browser = None
+                context = await p.chromium.launch_persistent_context(str(profile_path), headless=headless)
+                pages = list(context.pages[:1])
+            else:
+                browser = await p.chromium.launch(headless=headless)
+                context = await browser.new_context()
+                pages = []
 
-            if i > 0 and reload_every > 0 and i % reload_every == 0:
-                print(f"[reload] after {i} queries")
-                await page.reload(wait_until="domcontentloaded")
-                await accept_common_banners(page)
-                frame = await get_frame(page)
-                await frame.wait_for_selector(INPUT_SELECTOR, timeout=30000)
-                await ensure_radius_50(frame)
+            block_stats = None
+            if block_resources:
+                block_stats = await apply_blocking(context, block_types, block_hosts, allow_hosts)
+            while len(pages) < max(workers, 1):
+                pages.append(await context.new_page())
 
-            mode1 = await set_query_and_search_fast(frame, z)
-            mode = "zip" if mode1 == "ok" else "failed"
+            if direct_frame and not frame_url and frame_url_file is not None and frame_url_file.exists():
+                frame_url = frame_url_file.read_text(encoding="utf-8").strip() or None
+            if direct_frame and not frame_url:
+                frame_url = (await open_locator(pages[0], banner_marker=banner_marker)).url
+                if frame_url_file is not None:
+                    frame_url_file.write_text(frame_url, encoding="utf-8")
 
-            if mode1 == "failed":
-                mode2 = await set_query_and_search_fast(frame, f"{z}, CA")
-                mode = "zip_ca" if mode2 == "ok" else "failed"
+            print(f"Output: {store_path if store else out_path}")
+            print(f"CA ZIP seeds: {len(zips)} (step={zip_step})")
+            print(f"Existing addresses loaded: {len(sink)} ({resume})")
+            print(f"Result source: {source}")
+            print(f"Workers: {len(pages)}")
+            if profile_dir:
+                print(f"Profile: {profile_dir}")
+            if frame_url:
+                print(f"Direct frame: {frame_url}")
 
-            sidebar_text = await sidebar_snapshot(frame)
-            addrs = extract_unique_addresses(sidebar_text) if sidebar_text else []
-            new_addrs = [a for a in addrs if a not in seen]
+            seeds: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+            for i, z in todo:
+                seeds.put_nowait((i, z))
+            results: "asyncio.Queue[Optional[PendingResult]]" = asyncio.Queue()
 
-            if new_addrs:
-                with out_path.open("a", encoding="utf-8") as f:
-                    for a in new_addrs:
-                        a_clean = norm(a)
-                        f.write(a_clean + "\n")
-                        seen.add(a_clean)
-                        print(f"NEW: {a_clean}")
+            diffs: List[Optional[SidebarDiff]] = [
+                SidebarDiff(block_cache_size) if source == "sidebar" and block_cache_size > 0 else None
+                for _ in pages
+            ]
 
-            print(f"[{i+1}] zip={z} mode={mode} found={len(addrs)} unique={len(seen)} +{len(new_addrs)}")
+            async with sink:
+                writer = asyncio.create_task(write_results(results, sink))
+                try:
+                    await asyncio.gather(
+                        *(
+                            browser_worker(
+                                w, page, seeds, results, source, data_url, reload_every, delay_ms,
+                                frame_url, banner_marker, recycle, parser, diffs[w], snapshots,
+                            )
+                            for w, page in enumerate(pages)
+                        )
+                    )
+                finally:
+                    results.put_nowait(None)
+                    await writer
+            if seed_journal is not None:
+                print(f"Journal: all seeds done, rotated to {seed_journal.rotate()}")
 
-            if delay_ms > 0:
-                await page.wait_for_timeout(delay_ms)
+            if parser is None and source == "sidebar":
+                stats = parse_cache_stats()
+                print(
+                    f"Parse cache: hits={stats['hits']} misses={stats['misses']} "
+                    f"entries={stats['entries']} hit_rate={stats['hit_rate']:.1%}"
+                )
+            active = [d for d in diffs if d is not None]
+            if active:
+                parsed = sum(d.parsed for d in active)
+                reused = sum(d.reused for d in active)
+                print(f"Entry blocks: parsed={parsed} reused={reused}")
+            if snapshots is not None:
+                print(f"Snapshot cache: {snapshots.root} (reused {snapshots.hits})")
+            if block_stats is not None:
+                print(f"Blocked requests: {block_stats['blocked']} (allowed {block_stats['allowed']})")
 
-        await browser.close()
+            if browser is not None:
+                await browser.close()
+            else:
+                await context.close()
+    finally:
+        if parser is not None:
+            parser.shutdown()
 
 
 if __name__ == "__main__":
@@ -261,16 +1815,98 @@ if __name__ == "__main__":
     ap.add_argument("--delay_ms", type=int, default=150)
     ap.add_argument("--max_queries", type=int, default=0)
     ap.add_argument("--zip_step", type=int, default=5)
-    ap.add_argument("--reload_every", type=int, default=25)
+    ap.add_argument("--reload_every", type=int, default=200)
+    ap.add_argument("--recycle_heap_mb", type=float, default=RecyclePolicy().heap_mb)
+    ap.add_argument("--recycle_nodes", type=int, default=RecyclePolicy().nodes)
+    ap.add_argument("--recycle_latency_factor", type=float, default=RecyclePolicy().latency_factor)
+    ap.add_argument("--source", choices=("sidebar", "network", "dom"), default="sidebar")
+    ap.add_argument("--data_url_pattern", default=DATA_URL_PATTERN)
+    ap.add_argument("--engine", choices=("browser", "http"), default="browser")
+    ap.add_argument("--data_url", default=None)
+    ap.add_argument("--zip_centroids", default=None)
+    ap.add_argument("--http_connections", type=int, default=8)
+    ap.add_argument("--workers", type=int, default=1)
+    ap.add_argument("--shards", type=int, default=1)
+    ap.add_argument("--parse_workers", type=int, default=0)
+    ap.add_argument("--parse_cache", type=int, default=PARSE_CACHE_SIZE)
+    ap.add_argument("--block_cache", type=int, default=BLOCK_CACHE_SIZE)
+    ap.add_argument("--flush_rows", type=int, default=SINK_FLUSH_ROWS)
+    ap.add_argument("--flush_seconds", type=float, default=SINK_FLUSH_SECONDS)
+    ap.add_argument("--store", default=None, help="SQLite result store used instead of the CSV")
+    ap.add_argument("--export_csv", default=None, help="write the --store addresses to this CSV and exit")
+    ap.add_argument("--export_columnar", default=None, help="write the --store as .parquet (or .arrow) and exit")
+    ap.add_argument("--export_row_group", type=int, default=EXPORT_ROW_GROUP)
+    ap.add_argument("--no_journal", action="store_true", help="re-query seeds already recorded in OUT.journal")
+    ap.add_argument("--snapshot_dir", default=None, help="keep compressed raw results here for --reparse")
+    ap.add_argument("--snapshot_ttl_h", type=float, default=SNAPSHOT_TTL_S / 3600,
+                    help="reuse snapshots younger than this instead of re-querying (0 = always re-query)")
+    ap.add_argument("--reparse", action="store_true", help="rebuild the output from --snapshot_dir without a browser")
+    ap.add_argument("--overwrite", action="store_true", help="let --reparse replace an existing --out/--store")
+    ap.add_argument("--seen_index", choices=("exact", "digest"), default="exact")
+    ap.add_argument("--block_resources", action="store_true")
+    ap.add_argument("--block_types", default=",".join(BLOCK_RESOURCE_TYPES))
+    ap.add_argument("--block_hosts", default=",".join(BLOCK_HOSTS))
+    ap.add_argument("--allow_hosts", default="")
+    ap.add_argument("--direct_frame", action="store_true")
+    ap.add_argument("--frame_url", default=None)
+    ap.add_argument("--profile_dir", default=None)
     args = ap.parse_args()
 
-    asyncio.run(
-        run(
-            out_csv=args.out,
-            headless=not args.headful,
-            delay_ms=args.delay_ms,
-            max_queries=None if args.max_queries <= 0 else args.max_queries,
-            zip_step=args.zip_step,
-            reload_every=args.reload_every,
-        )
+    run_kwargs = dict(
+        out_csv=args.out,
+        headless=not args.headful,
+        delay_ms=args.delay_ms,
+        max_queries=None if args.max_queries <= 0 else args.max_queries,
+        zip_step=args.zip_step,
+        reload_every=args.reload_every,
+        source=args.source,
+        data_url_pattern=args.data_url_pattern,
+        engine=args.engine,
+        data_url_template=args.data_url,
+        zip_centroids=args.zip_centroids,
+        http_connections=args.http_connections,
+        workers=args.workers,
+        block_resources=args.block_resources,
+        block_types=split_list_arg(args.block_types),
+        block_hosts=split_list_arg(args.block_hosts),
+        allow_hosts=split_list_arg(args.allow_hosts),
+        direct_frame=args.direct_frame,
+        frame_url=args.frame_url,
+        profile_dir=args.profile_dir,
+        recycle=RecyclePolicy(
+            heap_mb=args.recycle_heap_mb,
+            nodes=args.recycle_nodes,
+            latency_factor=args.recycle_latency_factor,
+        ),
+        parse_workers=args.parse_workers,
+        parse_cache_size=args.parse_cache,
+        seen_index=args.seen_index,
+        block_cache_size=args.block_cache,
+        flush_rows=args.flush_rows,
+        flush_seconds=args.flush_seconds,
+        store=args.store,
+        journal=not args.no_journal,
+        snapshot_dir=args.snapshot_dir,
+        snapshot_ttl_s=args.snapshot_ttl_h * 3600,
+        reparse=args.reparse,
+        overwrite=args.overwrite,
     )
+
+    if args.export_csv or args.export_columnar:
+        if not args.store:
+            raise SystemExit("--export_csv/--export_columnar require --store")
+        store_path = Path(args.store).expanduser().resolve()
+        if args.export_csv:
+            n = export_store_csv(store_path, Path(args.export_csv).expanduser().resolve())
+            print(f"Exported {n} addresses to {args.export_csv}")
+        if args.export_columnar:
+            n = export_store_columnar(
+                store_path, Path(args.export_columnar).expanduser().resolve(), args.export_row_group
+            )
+            print(f"Exported {n} addresses to {args.export_columnar}")
+        raise SystemExit(0)
+
+    if args.shards > 1 and not args.reparse:
+        run_sharded(args.shards, **run_kwargs)
+    else:
+        asyncio.run(run(**run_kwargs))